@@ -14,6 +14,17 @@ class Settings(BaseSettings):
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
     
+    # Idempotency-Key records are kept this long before Mongo expires them
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    # A request holding an Idempotency-Key lock longer than this is presumed dead
+    IDEMPOTENCY_LEASE_SECONDS: int = 60
+    
+    # Profiling
+    PROFILE_HEADER: str = "X-Profile"  # send PROFILE_SECRET in this header to get Server-Timing spans back
+    PROFILE_SECRET: str = ""  # empty disables header-triggered profiling
+    PROFILE_SAMPLE_RATE: float = 0.0  # fraction of requests profiled and logged to app.request_profiles
+    SLOW_REQUEST_THRESHOLD_MS: float = 500  # 0 disables the slow-request log
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
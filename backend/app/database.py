@@ -1,22 +1,95 @@
+import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel
+from pymongo.errors import ConnectionFailure, PyMongoError
 from app.config import settings
+from app.profiling import CommandTimingListener
 
 client = None
 database = None
+index_task = None
+
+# Indexes per collection; each collection's list is sent in one createIndexes call
+INDEXES = {
+    "users": [
+        IndexModel("email", unique=True)
+    ],
+    # Task lists always sort on created_at, so it trails every compound index;
+    # (user_id, created_at) serves unfiltered lists and priority/due_before filters
+    "tasks": [
+        IndexModel([("user_id", 1), ("created_at", -1)]),
+        IndexModel([("user_id", 1), ("status", 1), ("created_at", -1)]),
+        IndexModel([("user_id", 1), ("tags", 1), ("created_at", -1)]),
+        IndexModel([("user_id", 1), ("parent_id", 1), ("created_at", -1)])
+    ],
+    "saved_filters": [
+        IndexModel([("user_id", 1), ("name", 1)], unique=True)
+    ],
+    "idempotency_keys": [
+        IndexModel([("user_id", 1), ("key", 1)], unique=True),
+        IndexModel("created_at", expireAfterSeconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    ]
+}
 
 async def connect_to_mongo():
-    global client, database
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    global client, database, index_task
+    # The client connects lazily, so this does not wait on the server
+    client = AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        event_listeners=[CommandTimingListener()]
+    )
     database = client[settings.DATABASE_NAME]
     print(f"✅ Connected to MongoDB: {settings.MONGODB_URL}")
-    
-    # Create indexes
-    await database.users.create_index("email", unique=True)
-    await database.tasks.create_index([("user_id", 1), ("status", 1)])
-    print("✅ Database indexes created")
+
+    # Build indexes in the background; /health/ready reports when they are done
+    index_task = asyncio.create_task(ensure_indexes())
+
+async def sync_idempotency_ttl():
+    """Apply a changed IDEMPOTENCY_KEY_TTL_SECONDS to the existing TTL index.
+
+    createIndexes refuses to change expireAfterSeconds on an existing index,
+    so it is updated in place with collMod instead.
+    """
+    indexes = await database.idempotency_keys.index_information()
+    ttl_index = indexes.get("created_at_1")
+    if ttl_index and ttl_index.get("expireAfterSeconds") != settings.IDEMPOTENCY_KEY_TTL_SECONDS:
+        await database.command(
+            "collMod",
+            "idempotency_keys",
+            index={
+                "keyPattern": {"created_at": 1},
+                "expireAfterSeconds": settings.IDEMPOTENCY_KEY_TTL_SECONDS
+            }
+        )
+
+async def ensure_indexes():
+    delay = 1
+    while True:
+        try:
+            await sync_idempotency_ttl()
+            await asyncio.gather(*(
+                database[name].create_indexes(indexes) for name, indexes in INDEXES.items()
+            ))
+            print("✅ Database indexes created")
+            return
+        except ConnectionFailure as e:
+            # MongoDB not reachable yet; other errors (e.g. an index that
+            # conflicts with existing data) will not fix themselves
+            print(f"⚠️ Index creation failed, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+        except PyMongoError as e:
+            print(f"❌ Index creation failed: {e}")
+            raise
+
+def indexes_ready() -> bool:
+    return index_task is not None and index_task.done() and not index_task.cancelled() \
+        and index_task.exception() is None
 
 async def close_mongo_connection():
     global client
+    if index_task and not index_task.done():
+        index_task.cancel()
     if client:
         client.close()
         print("❌ Disconnected from MongoDB")
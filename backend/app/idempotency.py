@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from app.database import get_database
+
+def _fingerprint(payload) -> str:
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+def _lease_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+
+async def _acquire(db, record_filter: dict, scope: str, fingerprint: str, lease_id: str) -> Optional[dict]:
+    """Take the lock for a key; returns the stored response instead if there is one"""
+    # The unique (user_id, key) index makes this insert the lock for the key
+    try:
+        await db.idempotency_keys.insert_one({
+            **record_filter,
+            "scope": scope,
+            "fingerprint": fingerprint,
+            "response": None,
+            "lease_id": lease_id,
+            "lease_expires_at": _lease_expiry(),
+            "created_at": datetime.utcnow()
+        })
+        return None
+    except DuplicateKeyError:
+        pass
+
+    record = await db.idempotency_keys.find_one(record_filter)
+    if record is not None and (record["scope"] != scope or record["fingerprint"] != fingerprint):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    if record is not None and record["response"] is not None:
+        return record["response"]
+
+    # A pending record whose lease ran out belongs to a request that died
+    # (worker crash, lost connection); the retry takes it over
+    if record is not None and record.get("lease_expires_at", datetime.min) < datetime.utcnow():
+        taken = await db.idempotency_keys.find_one_and_update(
+            {**record_filter, "response": None, "lease_id": record.get("lease_id")},
+            {"$set": {"lease_id": lease_id, "lease_expires_at": _lease_expiry()}}
+        )
+        if taken is not None:
+            return None
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still in progress"
+    )
+
+async def run_idempotent(
+    key: Optional[str],
+    user_id: str,
+    scope: str,
+    payload,
+    operation: Callable[[], Awaitable[dict]]
+) -> dict:
+    """Run a write once per Idempotency-Key and replay its stored response on retries"""
+    if not key:
+        return await operation()
+
+    db = get_database()
+    record_filter = {"user_id": user_id, "key": key}
+    lease_id = uuid.uuid4().hex
+
+    stored = await _acquire(db, record_filter, scope, _fingerprint(payload), lease_id)
+    if stored is not None:
+        return stored
+
+    try:
+        response = await operation()
+    except BaseException:
+        # Includes cancellation on shutdown: release the key so the client can retry.
+        # Shielded so a second cancellation can't abort the release itself.
+        await asyncio.shield(db.idempotency_keys.delete_one(
+            {**record_filter, "response": None, "lease_id": lease_id}
+        ))
+        raise
+
+    await db.idempotency_keys.update_one(
+        {**record_filter, "lease_id": lease_id},
+        {"$set": {"response": response}}
+    )
+    return response
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
+from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -46,15 +46,31 @@ class UserUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 # Task Schemas
+def normalize_tags(tags: Optional[List[str]]) -> Optional[List[str]]:
+    """Lowercase, trim and de-duplicate tags so equality lookups hit the index"""
+    if tags is None:
+        return None
+    normalized = []
+    for tag in tags:
+        tag = tag.strip().lower()
+        if not tag or len(tag) > 30:
+            raise ValueError("Tags must be between 1 and 30 characters")
+        if tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
 class TaskBase(BaseModel):
     title: str = Field(..., min_length=3, max_length=100)
     description: Optional[str] = Field(None, max_length=500)
     status: TaskStatus = TaskStatus.pending
     priority: TaskPriority = TaskPriority.medium
     due_date: Optional[datetime] = None
+    tags: List[str] = Field(default_factory=list, max_length=20)
+    
+    _normalize_tags = field_validator("tags")(normalize_tags)
 
 class TaskCreate(TaskBase):
-    pass
+    parent_id: Optional[str] = None
 
 class TaskUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=3, max_length=100)
@@ -62,15 +78,36 @@ class TaskUpdate(BaseModel):
     status: Optional[TaskStatus] = None
     priority: Optional[TaskPriority] = None
     due_date: Optional[datetime] = None
+    tags: Optional[List[str]] = Field(None, max_length=20)
+    
+    _normalize_tags = field_validator("tags")(normalize_tags)
 
 class TaskResponse(TaskBase):
     id: str = Field(alias="_id")
     user_id: str
+    parent_id: Optional[str] = None
+    subtask_count: int = 0
+    completed_subtask_count: int = 0
+    version: int = 0
     created_at: datetime
     updated_at: datetime
     
     model_config = ConfigDict(populate_by_name=True)
 
+# Saved Filter Schemas
+class TaskFilter(BaseModel):
+    status: Optional[List[TaskStatus]] = None
+    priority: Optional[List[TaskPriority]] = None
+    tags: Optional[List[str]] = Field(None, max_length=20)
+    parent_id: Optional[str] = None
+    due_before: Optional[datetime] = None
+    
+    _normalize_tags = field_validator("tags")(normalize_tags)
+
+class SavedFilterCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=50)
+    filter: TaskFilter
+
 # Token Schemas
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,145 @@
+import hmac
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import Request
+from pymongo import monitoring
+from app.config import settings
+
+slow_request_logger = logging.getLogger("app.slow_requests")
+profile_logger = logging.getLogger("app.request_profiles")
+
+# Profile of the request currently being handled (None when profiling is off)
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """Span timings and Mongo commands recorded for a single request"""
+
+    def __init__(self, method: str, path: str, mode: Optional[str]):
+        self.method = method
+        self.path = path
+        self.mode = mode  # "header", "sampled" or None (slow-request log only)
+        self.started = time.perf_counter()
+        self.spans = []
+        self.commands = []
+        self._pending = {}
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def to_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": round(self.elapsed_ms(), 2),
+            "spans": self.spans,
+            "mongo_commands": self.commands
+        }
+
+    def server_timing(self) -> str:
+        entries = [f"{s['name']};dur={s['duration_ms']}" for s in self.spans]
+        entries.append(f"total;dur={round(self.elapsed_ms(), 2)}")
+        return ", ".join(entries)
+
+
+@contextmanager
+def span(name: str):
+    """Time a phase of the current request; a no-op when profiling is off"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans.append({
+            "name": name,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+        })
+
+
+class CommandTimingListener(monitoring.CommandListener):
+    """Attach every Mongo command to the profile of the request that issued it"""
+
+    def started(self, event):
+        profile = _current_profile.get()
+        if profile is None:
+            return
+        entry = {
+            "command": event.command_name,
+            "collection": event.command.get(event.command_name),
+            # Field names only: filter values can hold emails and other user data
+            "filter_fields": sorted(event.command.get("filter") or event.command.get("query") or {}),
+            "duration_ms": None
+        }
+        profile.commands.append(entry)
+        profile._pending[event.request_id] = entry
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        entry = self._finish(event)
+        if entry is not None:
+            # The error message can quote document values (e.g. duplicate keys)
+            entry["failure"] = event.failure.get("codeName") or event.failure.get("code")
+
+    def _finish(self, event):
+        profile = _current_profile.get()
+        if profile is None:
+            return None
+        entry = profile._pending.pop(event.request_id, None)
+        if entry is not None:
+            entry["duration_ms"] = round(event.duration_micros / 1000, 2)
+        return entry
+
+
+def _profile_mode(request: Request) -> Optional[str]:
+    """"header" when the caller sent the configured secret, "sampled" when picked at random"""
+    supplied = request.headers.get(settings.PROFILE_HEADER)
+    if supplied and settings.PROFILE_SECRET and hmac.compare_digest(supplied, settings.PROFILE_SECRET):
+        return "header"
+    if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+def _log_profile(profile: RequestProfile, status_code: int):
+    duration_ms = profile.elapsed_ms()
+    record = profile.to_dict()
+    record["status_code"] = status_code
+    record["mode"] = profile.mode
+    if 0 < settings.SLOW_REQUEST_THRESHOLD_MS <= duration_ms:
+        slow_request_logger.warning(json.dumps(record, default=str))
+    elif profile.mode is not None:
+        profile_logger.info(json.dumps(record, default=str))
+
+
+async def profile_request(request: Request, call_next):
+    """HTTP middleware: record spans when requested or sampled, and log slow requests"""
+    mode = _profile_mode(request)
+    if mode is None and settings.SLOW_REQUEST_THRESHOLD_MS <= 0:
+        return await call_next(request)
+
+    profile = RequestProfile(request.method, request.url.path, mode)
+    token = _current_profile.set(profile)
+    try:
+        response = await call_next(request)
+    except Exception:
+        # Unhandled errors become a 500 further out; log them like any other request
+        _log_profile(profile, 500)
+        raise
+    finally:
+        _current_profile.reset(token)
+
+    _log_profile(profile, response.status_code)
+    # Timings only go back to callers who proved they may see them
+    if profile.mode == "header":
+        response.headers["Server-Timing"] = profile.server_timing()
+    return response
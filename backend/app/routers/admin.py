@@ -0,0 +1,92 @@
+import asyncio
+import cProfile
+import io
+import pstats
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from app.models import UserRole
+from app.auth import require_role
+
+router = APIRouter()
+
+# Profiler running on this worker, and the report from the last finished run
+_profiler = None
+_profiler_started_at = None
+_profiler_timer = None
+_last_report = None
+
+def _stop_profiler(top: int = 40):
+    global _profiler, _profiler_started_at, _profiler_timer, _last_report
+    if _profiler is None:
+        return _last_report
+
+    _profiler.disable()
+    if _profiler_timer is not None:
+        _profiler_timer.cancel()
+
+    stream = io.StringIO()
+    pstats.Stats(_profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+    _last_report = {
+        "started_at": _profiler_started_at,
+        "stopped_at": datetime.utcnow(),
+        "stats": stream.getvalue()
+    }
+    _profiler = None
+    _profiler_started_at = None
+    _profiler_timer = None
+    return _last_report
+
+@router.post("/profiler/start", response_model=dict)
+async def start_profiler(
+    seconds: int = Query(30, ge=1, le=300),
+    current_user: dict = Depends(require_role(UserRole.admin))
+):
+    """Profile this worker for the given number of seconds (Admin only)"""
+    global _profiler, _profiler_started_at, _profiler_timer
+
+    if _profiler is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Profiler is already running"
+        )
+
+    _profiler = cProfile.Profile()
+    _profiler_started_at = datetime.utcnow()
+    _profiler.enable()
+    _profiler_timer = asyncio.get_running_loop().call_later(seconds, _stop_profiler)
+
+    return {
+        "status": "success",
+        "message": f"Profiler started for {seconds} seconds",
+        "data": {"started_at": _profiler_started_at}
+    }
+
+@router.post("/profiler/stop", response_model=dict)
+async def stop_profiler(
+    top: int = Query(40, ge=1, le=500),
+    current_user: dict = Depends(require_role(UserRole.admin))
+):
+    """Stop the profiler early and return its report (Admin only)"""
+    if _profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Profiler is not running"
+        )
+
+    return {
+        "status": "success",
+        "message": "Profiler stopped",
+        "data": {"report": _stop_profiler(top)}
+    }
+
+@router.get("/profiler", response_model=dict)
+async def get_profiler(current_user: dict = Depends(require_role(UserRole.admin))):
+    """Get profiler state and the last report from this worker (Admin only)"""
+    return {
+        "status": "success",
+        "data": {
+            "running": _profiler is not None,
+            "started_at": _profiler_started_at,
+            "last_report": _last_report
+        }
+    }
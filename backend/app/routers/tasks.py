@@ -1,17 +1,137 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from app.models import TaskCreate, TaskUpdate, TaskResponse, TaskStatus, TaskPriority
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.models import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskStatus, TaskPriority, TaskFilter, SavedFilterCreate
+)
 from app.database import get_database
 from app.auth import get_current_user
+from app.profiling import span
+from app.idempotency import run_idempotent
 from datetime import datetime
+import hashlib
+import json
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from pydantic import ValidationError
 from typing import Optional, List
+import logging
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
+# parent_id value that selects top-level tasks (those without a parent)
+TOP_LEVEL = "none"
+
+def _etag(task: dict) -> str:
+    return f'"{task["version"]}"'
+
+def _parse_if_match(if_match: str) -> Optional[int]:
+    """Return the version an If-Match header expects, or None for "*" """
+    value = if_match.strip()
+    if value == "*":
+        return None
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match does not match the current task version"
+        )
+
+def _conditional_response(request: Request, payload: dict) -> Response:
+    """Send payload with a content ETag, or 304 if the client already has it"""
+    content = jsonable_encoder(payload)
+    digest = hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+    etag = f'W/"{digest}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return JSONResponse(content, headers={"ETag": etag})
+
+def _object_id(value: str, label: str) -> ObjectId:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {label}"
+        )
+
+def _serialize_task(task: dict) -> dict:
+    """Convert ObjectIds to strings and fill fields missing on older tasks"""
+    task["_id"] = str(task["_id"])
+    task["user_id"] = str(task["user_id"])
+    if task.get("parent_id") is not None:
+        task["parent_id"] = str(task["parent_id"])
+    task.setdefault("parent_id", None)
+    task.setdefault("tags", [])
+    task.setdefault("subtask_count", 0)
+    task.setdefault("completed_subtask_count", 0)
+    task.setdefault("version", 0)
+    return task
+
+def _build_task_filter(criteria: dict) -> TaskFilter:
+    """Validate filter criteria from query params or a saved filter"""
+    try:
+        return TaskFilter(**criteria)
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = ".".join(str(part) for part in error["loc"])
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid filter {field}: {error['msg']}"
+        )
+
+def _compile_task_filter(user_id: str, task_filter: TaskFilter) -> dict:
+    """Build a Mongo query led by user_id so the compound task indexes can serve it"""
+    query = {"user_id": ObjectId(user_id)}
+    if task_filter.status:
+        query["status"] = {"$in": [s.value for s in task_filter.status]}
+    if task_filter.priority:
+        query["priority"] = {"$in": [p.value for p in task_filter.priority]}
+    if task_filter.tags:
+        query["tags"] = {"$all": task_filter.tags}
+    if task_filter.parent_id == TOP_LEVEL:
+        query["parent_id"] = None
+    elif task_filter.parent_id:
+        query["parent_id"] = _object_id(task_filter.parent_id, "parent ID")
+    if task_filter.due_before:
+        query["due_date"] = {"$lte": task_filter.due_before}
+    return query
+
+def _is_completed(task: dict) -> bool:
+    return task.get("status") == TaskStatus.completed.value
+
+async def _update_parent_progress(db, parent_id: Optional[ObjectId], subtasks: int = 0, completed: int = 0):
+    """Apply a change in subtask counts to the parent's progress rollup"""
+    if parent_id is None or (not subtasks and not completed):
+        return
+    try:
+        await db.tasks.update_one(
+            {"_id": parent_id},
+            {"$inc": {"subtask_count": subtasks, "completed_subtask_count": completed}}
+        )
+    except PyMongoError:
+        # The child write already happened and nothing recomputes the rollup,
+        # so the parent's counters stay off; log enough to repair it by hand
+        logger.exception(
+            "Failed to update subtask progress for parent task %s (subtasks %+d, completed %+d)",
+            parent_id, subtasks, completed
+        )
+
 @router.get("/", response_model=dict)
 async def get_tasks(
+    request: Request,
     status_filter: Optional[TaskStatus] = Query(None, alias="status"),
     priority: Optional[TaskPriority] = None,
+    tag: Optional[List[str]] = Query(None),
+    parent_id: Optional[str] = None,
+    filter_id: Optional[str] = None,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     current_user: dict = Depends(get_current_user)
@@ -19,41 +139,64 @@ async def get_tasks(
     """Get all tasks for current user with filtering and pagination"""
     db = get_database()
     
-    # Build query - convert user_id string to ObjectId
-    query = {"user_id": ObjectId(current_user["_id"])}
+    # Start from a saved filter if given; explicit query params override it
+    task_filter = TaskFilter()
+    if filter_id:
+        saved = await db.saved_filters.find_one({
+            "_id": _object_id(filter_id, "filter ID"),
+            "user_id": ObjectId(current_user["_id"])
+        })
+        if not saved:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Saved filter not found"
+            )
+        task_filter = _build_task_filter(saved["filter"])
+    
+    overrides = {}
     if status_filter:
-        query["status"] = status_filter.value
+        overrides["status"] = [status_filter]
     if priority:
-        query["priority"] = priority.value
+        overrides["priority"] = [priority]
+    if tag:
+        overrides["tags"] = tag
+    if parent_id:
+        overrides["parent_id"] = parent_id
+    if overrides:
+        task_filter = _build_task_filter({**task_filter.model_dump(), **overrides})
+    
+    query = _compile_task_filter(current_user["_id"], task_filter)
     
     # Get total count
-    total = await db.tasks.count_documents(query)
+    with span("count_documents"):
+        total = await db.tasks.count_documents(query)
     
     # Get paginated tasks
     skip = (page - 1) * limit
-    cursor = db.tasks.find(query).sort("created_at", -1).skip(skip).limit(limit)
-    tasks = await cursor.to_list(length=limit)
-    
-    # Convert ObjectId to string
-    for task in tasks:
-        task["_id"] = str(task["_id"])
-        task["user_id"] = str(task["user_id"])
+    with span("find"):
+        cursor = db.tasks.find(query).sort("created_at", -1).skip(skip).limit(limit)
+        tasks = await cursor.to_list(length=limit)
     
-    return {
-        "status": "success",
-        "results": len(tasks),
-        "data": {
-            "tasks": tasks,
-            "pagination": {
-                "current_page": page,
-                "total_pages": (total + limit - 1) // limit,
-                "total_tasks": total
+    # Convert ObjectIds and encode the JSON body with its ETag
+    with span("serialize"):
+        for task in tasks:
+            _serialize_task(task)
+        
+        return _conditional_response(request, {
+            "status": "success",
+            "results": len(tasks),
+            "data": {
+                "tasks": tasks,
+                "pagination": {
+                    "current_page": page,
+                    "total_pages": (total + limit - 1) // limit,
+                    "total_tasks": total
+                }
             }
-        }
-    }
+        })
 
 @router.get("/stats", response_model=dict)
-async def get_task_stats(current_user: dict = Depends(get_current_user)):
+async def get_task_stats(request: Request, current_user: dict = Depends(get_current_user)):
     """Get task statistics for current user"""
     db = get_database()
     
@@ -71,17 +214,96 @@ async def get_task_stats(current_user: dict = Depends(get_current_user)):
     # Get total count
     total = await db.tasks.count_documents({"user_id": user_id})
     
-    return {
+    return _conditional_response(request, {
         "status": "success",
         "data": {
             "total_tasks": total,
             "by_status": stats
         }
+    })
+
+@router.get("/filters", response_model=dict)
+async def get_saved_filters(current_user: dict = Depends(get_current_user)):
+    """Get saved task filters for current user"""
+    db = get_database()
+    
+    cursor = db.saved_filters.find({"user_id": ObjectId(current_user["_id"])}).sort("name", 1)
+    filters = await cursor.to_list(length=None)
+    
+    for saved in filters:
+        saved["_id"] = str(saved["_id"])
+        saved["user_id"] = str(saved["user_id"])
+    
+    return {
+        "status": "success",
+        "results": len(filters),
+        "data": {"filters": filters}
+    }
+
+@router.post("/filters", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_saved_filter(
+    saved_filter: SavedFilterCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Save a named task filter for current user"""
+    db = get_database()
+    
+    # Reject filters that would not compile, e.g. a malformed parent ID
+    _compile_task_filter(current_user["_id"], saved_filter.filter)
+    
+    filter_dict = {
+        "name": saved_filter.name,
+        "filter": saved_filter.filter.model_dump(exclude_none=True),
+        "user_id": ObjectId(current_user["_id"]),
+        "created_at": datetime.utcnow()
+    }
+    
+    try:
+        result = await db.saved_filters.insert_one(filter_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A saved filter with this name already exists"
+        )
+    
+    filter_dict["_id"] = str(result.inserted_id)
+    filter_dict["user_id"] = str(filter_dict["user_id"])
+    
+    return {
+        "status": "success",
+        "message": "Filter saved successfully",
+        "data": {"filter": filter_dict}
+    }
+
+@router.delete("/filters/{filter_id}", response_model=dict)
+async def delete_saved_filter(
+    filter_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Delete a saved task filter"""
+    db = get_database()
+    
+    result = await db.saved_filters.delete_one({
+        "_id": _object_id(filter_id, "filter ID"),
+        "user_id": ObjectId(current_user["_id"])
+    })
+    
+    if result.deleted_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Saved filter not found"
+        )
+    
+    return {
+        "status": "success",
+        "message": "Filter deleted successfully",
+        "data": None
     }
 
 @router.get("/{task_id}", response_model=dict)
 async def get_task(
     task_id: str,
+    response: Response,
     current_user: dict = Depends(get_current_user)
 ):
     """Get a single task by ID"""
@@ -108,8 +330,8 @@ async def get_task(
             detail="Not authorized to access this task"
         )
     
-    task["_id"] = str(task["_id"])
-    task["user_id"] = str(task["user_id"])
+    _serialize_task(task)
+    response.headers["ETag"] = _etag(task)
     
     return {
         "status": "success",
@@ -119,32 +341,62 @@ async def get_task(
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task: TaskCreate,
+    idempotency_key: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new task"""
     db = get_database()
     
-    task_dict = {
-        **task.model_dump(),
-        "user_id": ObjectId(current_user["_id"]),
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
-    
-    result = await db.tasks.insert_one(task_dict)
-    task_dict["_id"] = str(result.inserted_id)
-    task_dict["user_id"] = str(task_dict["user_id"])
+    async def insert_task():
+        task_dict = {
+            **task.model_dump(),
+            "user_id": ObjectId(current_user["_id"]),
+            "subtask_count": 0,
+            "completed_subtask_count": 0,
+            "version": 1,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        }
+        
+        # Subtasks can only be added under the user's own tasks
+        if task.parent_id:
+            parent_id = _object_id(task.parent_id, "parent ID")
+            parent = await db.tasks.find_one({"_id": parent_id, "user_id": task_dict["user_id"]})
+            if not parent:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Parent task not found"
+                )
+            task_dict["parent_id"] = parent_id
+        
+        result = await db.tasks.insert_one(task_dict)
+        await _update_parent_progress(
+            db, task_dict["parent_id"], subtasks=1, completed=int(_is_completed(task_dict))
+        )
+        task_dict["_id"] = result.inserted_id
+        _serialize_task(task_dict)
+        
+        return {
+            "status": "success",
+            "message": "Task created successfully",
+            "data": {"task": task_dict}
+        }
     
-    return {
-        "status": "success",
-        "message": "Task created successfully",
-        "data": {"task": task_dict}
-    }
+    # Retried POSTs with the same Idempotency-Key get the original task back
+    return await run_idempotent(
+        idempotency_key,
+        current_user["_id"],
+        "POST /tasks",
+        task.model_dump(),
+        insert_task
+    )
 
 @router.put("/{task_id}", response_model=dict)
 async def update_task(
     task_id: str,
     task_update: TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user)
 ):
     """Update a task"""
@@ -175,15 +427,46 @@ async def update_task(
     update_data = {k: v for k, v in task_update.model_dump(exclude_unset=True).items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
     
-    await db.tasks.update_one(
-        {"_id": ObjectId(task_id)},
-        {"$set": update_data}
+    # With If-Match the version check is part of the update filter, so a
+    # concurrent edit between our read and this write cannot be overwritten
+    update_filter = {"_id": ObjectId(task_id)}
+    if if_match is not None:
+        expected_version = _parse_if_match(if_match)
+        if expected_version is not None:
+            # Tasks created before versioning have no version field (version 0)
+            update_filter["version"] = expected_version if expected_version > 0 else None
+    
+    # The pre-image tells us the status this write replaced, for the parent rollup
+    previous_task = await db.tasks.find_one_and_update(
+        update_filter,
+        {"$set": update_data, "$inc": {"version": 1}},
+        return_document=ReturnDocument.BEFORE
+    )
+    
+    if previous_task is None:
+        if if_match is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match does not match the current task version"
+        )
+    
+    updated_task = {
+        **previous_task,
+        **update_data,
+        "version": previous_task.get("version", 0) + 1
+    }
+    await _update_parent_progress(
+        db,
+        previous_task.get("parent_id"),
+        completed=int(_is_completed(updated_task)) - int(_is_completed(previous_task))
     )
     
-    # Fetch updated task
-    updated_task = await db.tasks.find_one({"_id": ObjectId(task_id)})
-    updated_task["_id"] = str(updated_task["_id"])
-    updated_task["user_id"] = str(updated_task["user_id"])
+    _serialize_task(updated_task)
+    response.headers["ETag"] = _etag(updated_task)
     
     return {
         "status": "success",
@@ -220,7 +503,20 @@ async def delete_task(
             detail="Not authorized to delete this task"
         )
     
-    await db.tasks.delete_one({"_id": ObjectId(task_id)})
+    deleted_task = await db.tasks.find_one_and_delete({"_id": ObjectId(task_id)})
+    
+    if deleted_task:
+        await _update_parent_progress(
+            db,
+            deleted_task.get("parent_id"),
+            subtasks=-1,
+            completed=-int(_is_completed(deleted_task))
+        )
+        # Subtasks of a deleted task become top-level tasks
+        await db.tasks.update_many(
+            {"user_id": deleted_task["user_id"], "parent_id": deleted_task["_id"]},
+            {"$set": {"parent_id": None}}
+        )
     
     return {
         "status": "success",
@@ -0,0 +1,201 @@
+"""Startup benchmark: import time of main.py and time to first response.
+
+Run from the backend directory:
+
+    python benchmarks/startup.py            # print results
+    python benchmarks/startup.py --record   # also append them to startup_history.jsonl
+
+Liveness is polled on /health, which older commits also serve, so runs stay
+comparable across history. Time to /health/ready needs a reachable MongoDB;
+without one (or on commits without that endpoint) it is reported as null.
+
+With MongoDB reachable, the run also times the worker's first POST /auth/login
+and first authenticated GET /tasks. That is where the lazily imported
+bcrypt/passlib and python-jose are paid for. The benchmark user lives in a
+throwaway database (DATABASE_NAME + "_startup_benchmark") that is dropped
+afterwards.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_FILE = os.path.join(BACKEND_DIR, "benchmarks", "startup_history.jsonl")
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import main; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+BENCHMARK_EMAIL = "startup-benchmark@example.com"
+BENCHMARK_PASSWORD = "startup-benchmark"
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "startup-benchmark")
+    return env
+
+def _benchmark_database():
+    """(MongoDB URL, database name) the benchmark worker should use"""
+    url = os.environ.get("MONGODB_URL", "mongodb://localhost:27017")
+    name = os.environ.get("DATABASE_NAME", "fastapi_tasks") + "_startup_benchmark"
+    return url, name
+
+def _seed_user():
+    """Create the login user up front so the worker itself never hashes at startup.
+
+    Returns a MongoClient to clean up with, or None when MongoDB is unreachable.
+    """
+    from passlib.context import CryptContext
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    url, name = _benchmark_database()
+    client = MongoClient(url, serverSelectionTimeoutMS=2000)
+    try:
+        client[name].users.replace_one(
+            {"email": BENCHMARK_EMAIL},
+            {
+                "name": "Startup Benchmark",
+                "email": BENCHMARK_EMAIL,
+                "password": CryptContext(schemes=["bcrypt"]).hash(BENCHMARK_PASSWORD),
+                "role": "user",
+                "is_active": True,
+                "created_at": datetime.utcnow(),
+                "last_login": None
+            },
+            upsert=True
+        )
+    except PyMongoError:
+        client.close()
+        return None
+    return client
+
+def _timed_request(url: str, data: dict = None, token: str = None):
+    """(ms, parsed JSON body) for one request, or (None, None) if it fails"""
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    body = json.dumps(data).encode() if data is not None else None
+    request = urllib.request.Request(url, data=body, headers=headers)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            payload = json.loads(response.read())
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return None, None
+    return (time.perf_counter() - start) * 1000, payload
+
+def measure_import(runs: int) -> float:
+    """Median time to import main in a fresh interpreter, in ms"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=_env()
+        )
+        samples.append(float(output.decode().strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _wait_for(url: str, start: float, timeout: float):
+    """Poll url until it returns 200; ms since start, or None on timeout"""
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return (time.perf_counter() - start) * 1000
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    return None
+
+def measure_first_response(timeout: float) -> dict:
+    """Spawn a uvicorn worker and time its first live, ready, login and task list responses"""
+    mongo = _seed_user()
+    url, name = _benchmark_database()
+    env = {**_env(), "MONGODB_URL": url, "DATABASE_NAME": name}
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    login_ms = tasks_ms = None
+    try:
+        live_ms = _wait_for(f"{base_url}/health", start, timeout)
+        ready_ms = _wait_for(f"{base_url}/health/ready", start, timeout) if live_ms else None
+        if ready_ms and mongo is not None:
+            login_ms, login = _timed_request(
+                f"{base_url}/api/v1/auth/login",
+                {"email": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD}
+            )
+            if login is not None:
+                tasks_ms, _ = _timed_request(
+                    f"{base_url}/api/v1/tasks/", token=login["data"]["token"]
+                )
+    finally:
+        process.terminate()
+        process.wait()
+        if mongo is not None:
+            mongo.drop_database(name)
+            mongo.close()
+    return {
+        "first_live_ms": live_ms,
+        "first_ready_ms": ready_ms,
+        "first_login_ms": login_ms,
+        "first_tasks_ms": tasks_ms
+    }
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="import runs to take the median of")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds to wait for each health check")
+    parser.add_argument("--record", action="store_true", help=f"append results to {HISTORY_FILE}")
+    parser.add_argument("--note", help="free-text note stored with the run, e.g. the environment")
+    args = parser.parse_args()
+
+    result = {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "import_ms": round(measure_import(args.runs), 1),
+        **{
+            key: round(value, 1) if value is not None else None
+            for key, value in measure_first_response(args.timeout).items()
+        }
+    }
+    if args.note:
+        result["note"] = args.note
+    print(json.dumps(result, indent=2))
+
+    if args.record:
+        with open(HISTORY_FILE, "a") as history:
+            history.write(json.dumps(result) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.database import connect_to_mongo, close_mongo_connection
-from app.routers import auth, tasks, users
+from app.database import connect_to_mongo, close_mongo_connection, get_database, indexes_ready
+from app.routers import auth, tasks, users, admin
+from app.profiling import profile_request
 from app.config import settings
 
 @asynccontextmanager
@@ -27,12 +29,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],  # readable by the frontend's fetch()
 )
 
+# Request profiling and slow-request log
+app.middleware("http")(profile_request)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["Tasks"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users (Admin)"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
 
 @app.get("/")
 async def root():
@@ -44,8 +51,26 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check():
+@app.get("/health/live")
+async def liveness_check():
+    """The process is up and serving requests; does not touch the database"""
+    return {"status": "healthy"}
+
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    """Ready for traffic once MongoDB answers and startup indexes exist"""
+    try:
+        await asyncio.wait_for(get_database().command("ping"), timeout=2)
+        database_status = "connected"
+    except Exception:
+        database_status = "unreachable"
+
+    ready = database_status == "connected" and indexes_ready()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
     return {
-        "status": "healthy",
-        "database": "connected"
+        "status": "ready" if ready else "not ready",
+        "database": database_status,
+        "indexes": "ready" if indexes_ready() else "pending"
     }
@@ -1,7 +1,49 @@
 // API Communication
 
+// GET responses by URL with their ETag, revalidated with If-None-Match
+const responseCache = new Map();
+// GET requests currently in flight by URL, so identical calls share one fetch
+const inFlightRequests = new Map();
+// Latest request per channel (e.g. the task list); starting a new one aborts the old one
+const channelControllers = new Map();
+
+function clearApiCache() {
+    responseCache.clear();
+}
+
+function isAbortError(error) {
+    return error && error.name === 'AbortError';
+}
+
+// GET with de-duplication, ETag revalidation and optional latest-wins cancellation
+function cachedGet(url, { channel } = {}) {
+    if (inFlightRequests.has(url)) {
+        return inFlightRequests.get(url);
+    }
+    
+    let signal;
+    if (channel) {
+        const previous = channelControllers.get(channel);
+        if (previous) previous.abort();
+        const controller = new AbortController();
+        channelControllers.set(channel, controller);
+        signal = controller.signal;
+    }
+    
+    const request = apiCall(url, { signal }).finally(() => {
+        inFlightRequests.delete(url);
+        if (channel && channelControllers.get(channel)?.signal === signal) {
+            channelControllers.delete(channel);
+        }
+    });
+    inFlightRequests.set(url, request);
+    return request;
+}
+
 async function apiCall(url, options = {}) {
     const token = getToken();
+    const method = (options.method || 'GET').toUpperCase();
+    const cached = method === 'GET' ? responseCache.get(url) : null;
     
     const headers = {
         'Content-Type': 'application/json',
@@ -12,17 +54,29 @@ async function apiCall(url, options = {}) {
         headers['Authorization'] = `Bearer ${token}`;
     }
     
+    if (cached) {
+        headers['If-None-Match'] = cached.etag;
+    }
+    
     try {
         const response = await fetch(url, {
             ...options,
+            // Keep the browser's HTTP cache out of the way so 304s reach us
+            cache: method === 'GET' ? 'no-store' : options.cache,
             headers
         });
         
+        // Unchanged since we last fetched it; hand out a copy so callers can't alter the cache
+        if (response.status === 304 && cached) {
+            return structuredClone(cached.data);
+        }
+        
         // Try to parse JSON response
         let data;
         try {
             data = await response.json();
         } catch (e) {
+            if (isAbortError(e)) throw e;
             // If JSON parsing fails, create a generic error
             data = { detail: 'Server error occurred' };
         }
@@ -42,6 +96,8 @@ async function apiCall(url, options = {}) {
                 throw new Error(data.detail || 'Invalid input data');
             } else if (response.status === 404) {
                 throw new Error('Resource not found');
+            } else if (response.status === 412) {
+                throw new Error('This task was changed by someone else. Please reload and try again.');
             } else if (response.status === 500) {
                 throw new Error('Server error occurred');
             }
@@ -50,8 +106,17 @@ async function apiCall(url, options = {}) {
             throw new Error(data.detail || `Error: ${response.status}`);
         }
         
+        const etag = response.headers.get('ETag');
+        if (method === 'GET' && etag) {
+            responseCache.set(url, { etag, data: structuredClone(data) });
+        }
+        
         return data;
     } catch (error) {
+        if (isAbortError(error)) {
+            // Superseded by a newer request; callers ignore these
+            throw error;
+        }
         console.error('API Error:', error);
         // Re-throw the error to be caught by the calling function
         throw error;
@@ -85,27 +150,35 @@ const tasksAPI = {
         const params = new URLSearchParams();
         if (filters.status) params.append('status', filters.status);
         if (filters.priority) params.append('priority', filters.priority);
+        if (filters.parent_id) params.append('parent_id', filters.parent_id);
         if (filters.page) params.append('page', filters.page);
         if (filters.limit) params.append('limit', filters.limit);
         
         const url = `${API_ENDPOINTS.TASKS}${params.toString() ? '?' + params.toString() : ''}`;
-        return await apiCall(url);
+        // Only the most recent list request matters; older ones are aborted
+        return await cachedGet(url, { channel: 'task-list' });
     },
     
     async getTask(id) {
         return await apiCall(`${API_ENDPOINTS.TASKS}/${id}`);
     },
     
-    async createTask(taskData) {
+    async createTask(taskData, idempotencyKey = null) {
+        // Retrying with the same key returns the original task instead of a duplicate
+        const headers = idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {};
         return await apiCall(API_ENDPOINTS.TASKS, {
             method: 'POST',
+            headers,
             body: JSON.stringify(taskData)
         });
     },
     
-    async updateTask(id, taskData) {
+    async updateTask(id, taskData, version = null) {
+        // Only apply the update if nobody changed the task since we loaded it
+        const headers = version !== null ? { 'If-Match': `"${version}"` } : {};
         return await apiCall(`${API_ENDPOINTS.TASKS}/${id}`, {
             method: 'PUT',
+            headers,
             body: JSON.stringify(taskData)
         });
     },
@@ -117,7 +190,7 @@ const tasksAPI = {
     },
     
     async getStats() {
-        return await apiCall(API_ENDPOINTS.TASK_STATS);
+        return await cachedGet(API_ENDPOINTS.TASK_STATS);
     }
 };
 
@@ -1,6 +1,12 @@
 // Main Application Logic
 
 let currentTask = null;
+let createTaskKey = null;
+
+// Tasks on screen and dashboard counters, updated locally after each change
+const TASKS_PAGE_SIZE = 10;
+let currentTasks = [];
+let taskStats = { total: 0, pending: 0, 'in-progress': 0, completed: 0 };
 
 // Initialize app
 document.addEventListener('DOMContentLoaded', () => {
@@ -45,8 +51,8 @@ async function showDashboard() {
     document.getElementById('app').innerHTML = renderDashboard();
     
     // Add filter listeners
-    document.getElementById('statusFilter').addEventListener('change', loadTasks);
-    document.getElementById('priorityFilter').addEventListener('change', loadTasks);
+    document.getElementById('statusFilter').addEventListener('change', () => loadTasks());
+    document.getElementById('priorityFilter').addEventListener('change', () => loadTasks());
     
     // Load data
     await Promise.all([loadStats(), loadTasks()]);
@@ -112,30 +118,40 @@ async function loadStats() {
         const response = await tasksAPI.getStats();
         const { total_tasks, by_status } = response.data;
         
-        document.getElementById('totalTasks').textContent = total_tasks;
-        
-        const pending = by_status.find(s => s._id === 'pending')?.count || 0;
-        const inProgress = by_status.find(s => s._id === 'in-progress')?.count || 0;
-        const completed = by_status.find(s => s._id === 'completed')?.count || 0;
-        
-        document.getElementById('pendingTasks').textContent = pending;
-        document.getElementById('inProgressTasks').textContent = inProgress;
-        document.getElementById('completedTasks').textContent = completed;
+        taskStats = {
+            total: total_tasks,
+            pending: by_status.find(s => s._id === 'pending')?.count || 0,
+            'in-progress': by_status.find(s => s._id === 'in-progress')?.count || 0,
+            completed: by_status.find(s => s._id === 'completed')?.count || 0
+        };
+        renderStats();
     } catch (error) {
         console.error('Failed to load stats:', error);
     }
 }
 
+function renderStats() {
+    if (!document.getElementById('totalTasks')) return;
+    
+    document.getElementById('totalTasks').textContent = taskStats.total;
+    document.getElementById('pendingTasks').textContent = taskStats.pending;
+    document.getElementById('inProgressTasks').textContent = taskStats['in-progress'];
+    document.getElementById('completedTasks').textContent = taskStats.completed;
+}
+
 // Load Tasks
-async function loadTasks() {
+async function loadTasks({ quiet = false } = {}) {
     const statusFilter = document.getElementById('statusFilter')?.value;
     const priorityFilter = document.getElementById('priorityFilter')?.value;
     const tasksList = document.getElementById('tasksList');
     
     try {
-        tasksList.innerHTML = '<div class="loading">Loading tasks...</div>';
+        if (!quiet) {
+            tasksList.innerHTML = '<div class="loading">Loading tasks...</div>';
+        }
         
-        const filters = {};
+        // The board lists top-level tasks; subtasks stay under their parents
+        const filters = { limit: TASKS_PAGE_SIZE, parent_id: 'none' };
         if (statusFilter) filters.status = statusFilter;
         if (priorityFilter) filters.priority = priorityFilter;
         
@@ -146,17 +162,81 @@ async function loadTasks() {
         const tasks = response.data?.tasks || response.tasks || response.data || [];
         console.log('Extracted tasks:', tasks); // Debug log
         
+        currentTasks = [...tasks];
         tasksList.innerHTML = renderTasksList(tasks);
     } catch (error) {
+        // A newer filter selection superseded this request; it will render instead
+        if (isAbortError(error)) return;
         console.error('Load tasks error:', error);
         tasksList.innerHTML = showAlert('Failed to load tasks', 'error');
     }
 }
 
+function matchesFilters(task) {
+    const statusFilter = document.getElementById('statusFilter')?.value;
+    const priorityFilter = document.getElementById('priorityFilter')?.value;
+    return !task.parent_id &&
+        (!statusFilter || task.status === statusFilter) &&
+        (!priorityFilter || task.priority === priorityFilter);
+}
+
+// Apply a create (no oldTask), update, or delete (no newTask) to the list and stats.
+// Returns true when a task left a full page, so the next one should be pulled in.
+function applyTaskChange(oldTask, newTask) {
+    const wasFullPage = currentTasks.length >= TASKS_PAGE_SIZE;
+    const index = oldTask ? currentTasks.findIndex(t => t._id === oldTask._id) : -1;
+    let removed = false;
+    
+    // Always build a new array; never edit a list we got back from the API in place
+    if (newTask && matchesFilters(newTask)) {
+        if (index >= 0) {
+            currentTasks = currentTasks.map((t, i) => i === index ? newTask : t);
+        } else {
+            currentTasks = [newTask, ...currentTasks].slice(0, TASKS_PAGE_SIZE);
+        }
+    } else if (index >= 0) {
+        currentTasks = currentTasks.filter((t, i) => i !== index);
+        removed = true;
+    }
+    
+    if (oldTask) {
+        taskStats.total -= 1;
+        taskStats[oldTask.status] -= 1;
+    }
+    if (newTask) {
+        taskStats.total += 1;
+        taskStats[newTask.status] += 1;
+    }
+    
+    renderStats();
+    document.getElementById('tasksList').innerHTML = renderTasksList(currentTasks);
+    
+    return removed && wasFullPage;
+}
+
+// crypto.randomUUID only exists in secure contexts (HTTPS or localhost)
+function newIdempotencyKey() {
+    if (window.crypto?.randomUUID) {
+        return crypto.randomUUID();
+    }
+    if (window.crypto?.getRandomValues) {
+        const bytes = crypto.getRandomValues(new Uint8Array(16));
+        return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
 // Show Task Modal
 function showTaskModal(taskId = null) {
     if (taskId) {
-        // Load task and show edit modal
+        // Edit the copy we already have on screen; fall back to fetching it
+        const task = currentTasks.find(t => t._id === taskId);
+        if (task) {
+            currentTask = task;
+            showModal();
+            return;
+        }
+        
         tasksAPI.getTask(taskId).then(response => {
             currentTask = response.data.task;
             showModal();
@@ -170,6 +250,9 @@ function showTaskModal(taskId = null) {
 }
 
 function showModal() {
+    // One key per create form, so resubmitting after a network error can't duplicate the task
+    createTaskKey = currentTask ? null : newIdempotencyKey();
+    
     const modalHtml = renderTaskModal(currentTask);
     const modalContainer = document.createElement('div');
     modalContainer.id = 'taskModal';
@@ -224,18 +307,22 @@ async function handleTaskSubmit() {
             due_date: dueDateISO
         };
         
-        if (currentTask) {
-            await tasksAPI.updateTask(currentTask._id, taskData);
+        const previousTask = currentTask;
+        let response;
+        if (previousTask) {
+            response = await tasksAPI.updateTask(previousTask._id, taskData, previousTask.version ?? null);
         } else {
-            await tasksAPI.createTask(taskData);
+            response = await tasksAPI.createTask(taskData, createTaskKey);
         }
         
         closeModal();
-        await Promise.all([loadStats(), loadTasks()]);
+        if (applyTaskChange(previousTask, response.data.task)) {
+            loadTasks({ quiet: true });
+        }
         
         const dashboardMessage = document.getElementById('dashboardMessage');
         dashboardMessage.innerHTML = showAlert(
-            currentTask ? 'Task updated successfully' : 'Task created successfully',
+            previousTask ? 'Task updated successfully' : 'Task created successfully',
             'success'
         );
         setTimeout(() => dashboardMessage.innerHTML = '', 3000);
@@ -255,14 +342,20 @@ function editTask(taskId) {
 // Delete Task
 async function deleteTask(taskId) {
     showConfirmModal('Are you sure you want to delete this task?', async () => {
+        // Remove it right away; the server call confirms or we reload
+        const task = currentTasks.find(t => t._id === taskId);
+        const needsRefill = task ? applyTaskChange(task, null) : false;
+        
         try {
             await tasksAPI.deleteTask(taskId);
-            await Promise.all([loadStats(), loadTasks()]);
+            if (needsRefill) loadTasks({ quiet: true });
             
             const dashboardMessage = document.getElementById('dashboardMessage');
             dashboardMessage.innerHTML = showAlert('Task deleted successfully', 'success');
             setTimeout(() => dashboardMessage.innerHTML = '', 3000);
         } catch (error) {
+            await Promise.all([loadStats(), loadTasks({ quiet: true })]);
+            
             const dashboardMessage = document.getElementById('dashboardMessage');
             dashboardMessage.innerHTML = showAlert('Failed to delete task: ' + error.message, 'error');
             setTimeout(() => dashboardMessage.innerHTML = '', 3000);
@@ -32,6 +32,7 @@ function isAuthenticated() {
 function logout() {
     removeToken();
     removeUser();
+    clearApiCache();
     window.location.href = '/';
 }
 